@@ -0,0 +1,92 @@
+"""
+Model conversion for Freshness Predictor
+Converts the trained Keras model into an INT8 TFLite or an ONNX model for CPU serving
+
+Usage:
+    python convert_model.py --dataset /path/to/dataset
+    python convert_model.py --format onnx
+
+The dataset directory (same day_0 ... day_5 layout used for training) provides
+calibration images for full-integer TFLite quantization. Without it, only the
+weights are quantized (dynamic-range quantization).
+
+ONNX conversion needs tf2onnx; serve the result with MODEL_PATH=model.onnx.
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import tensorflow as tf
+from tensorflow import keras
+
+from main import IMG_SIZE, MODEL_PATH, TFLITE_MODEL_PATH, decode_image, preprocess_image
+
+# Default output path for ONNX conversion
+ONNX_MODEL_PATH = os.path.join(os.path.dirname(MODEL_PATH), "model.onnx")
+
+# Number of calibration images used for full-integer quantization
+NUM_CALIBRATION_IMAGES = 100
+
+def calibration_images(dataset_path: str):
+    """
+    Yield preprocessed calibration images from the dataset directory.
+    """
+    image_files = sorted(
+        list(Path(dataset_path).rglob("*.jpg")) + list(Path(dataset_path).rglob("*.png"))
+    )
+    for img_file in image_files[:NUM_CALIBRATION_IMAGES]:
+        with open(img_file, "rb") as f:
+            yield [preprocess_image(decode_image(f))]
+
+def convert_to_tflite(model_path: str, output_path: str, dataset_path: str = None):
+    """
+    Convert a Keras model to a quantized TFLite flatbuffer.
+    Input and output tensors stay float32, so the backend can feed it
+    the same preprocessed images as the Keras model.
+    """
+    model = keras.models.load_model(model_path)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if dataset_path:
+        # Full-integer quantization of weights and activations
+        converter.representative_dataset = lambda: calibration_images(dataset_path)
+        print(f"Calibrating with up to {NUM_CALIBRATION_IMAGES} images from {dataset_path}")
+    else:
+        print("⚠️  No dataset given - quantizing weights only")
+
+    tflite_model = converter.convert()
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+
+    print(f"✅ Saved {output_path} ({os.path.getsize(output_path) / 1e6:.1f} MB)")
+
+def convert_to_onnx(model_path: str, output_path: str):
+    """
+    Convert a Keras model to ONNX with a dynamic batch dimension.
+    """
+    import tf2onnx
+
+    model = keras.models.load_model(model_path)
+    input_signature = [tf.TensorSpec([None, *IMG_SIZE, 3], tf.float32, name="input")]
+    tf2onnx.convert.from_keras(
+        model, input_signature=input_signature, opset=17, output_path=output_path
+    )
+
+    print(f"✅ Saved {output_path} ({os.path.getsize(output_path) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the Keras model for CPU serving")
+    parser.add_argument("--model", default=MODEL_PATH, help="Keras model to convert")
+    parser.add_argument("--format", choices=["tflite", "onnx"], default="tflite",
+                        help="Target format (INT8 TFLite or ONNX)")
+    parser.add_argument("--output", default=None, help="Output path")
+    parser.add_argument("--dataset", default=None, help="Dataset directory for TFLite calibration")
+    args = parser.parse_args()
+
+    if args.format == "onnx":
+        convert_to_onnx(args.model, args.output or ONNX_MODEL_PATH)
+    else:
+        convert_to_tflite(args.model, args.output or TFLITE_MODEL_PATH, args.dataset)
@@ -5,68 +5,418 @@ High-performance API endpoint for serving the trained model
 
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import numpy as np
 from PIL import Image
-import io
 import os
-import hashlib
+import xxhash
+import asyncio
+import threading
+from typing import BinaryIO, List
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 
+def available_cpus() -> int:
+    """
+    Number of CPUs this process can actually use. os.cpu_count() reports
+    the host's cores, ignoring CPU affinity and container (cgroup) quotas.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    
+    # cgroup v2 CPU quota, e.g. "200000 100000" for 2 CPUs
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    
+    return cpus
+
+# Number of uvicorn worker processes when started with `python main.py`.
+# Each worker loads its own copy of the model, so prefer few workers with
+# micro-batching over one worker per core.
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+# CPU threads available to each worker for inference. The thread pools read
+# these environment variables on import, so they are set before TensorFlow
+# and Numba are loaded.
+CPU_THREADS = max(1, available_cpus() // WORKERS)
+os.environ.setdefault("OMP_NUM_THREADS", str(CPU_THREADS))
+os.environ.setdefault("NUMBA_NUM_THREADS", str(CPU_THREADS))
+os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "1")
+
 # Try to import TensorFlow - optional for demo mode
 try:
     import tensorflow as tf
     from tensorflow import keras
     TENSORFLOW_AVAILABLE = True
+    
+    # Must happen before TensorFlow creates its runtime (first op)
+    tf.config.threading.set_intra_op_parallelism_threads(
+        int(os.getenv("TF_INTRA", "0")) or CPU_THREADS
+    )
+    tf.config.threading.set_inter_op_parallelism_threads(int(os.getenv("TF_INTER", "2")))
 except ImportError:
     TENSORFLOW_AVAILABLE = False
     keras = None
 
+# ONNX Runtime is optional - serves .onnx models without TensorFlow
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+# OpenCV gives a much faster (SIMD) resize; fall back to Pillow without it
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+# Numba fuses the uint8 -> float32 normalization into one parallel pass;
+# plain NumPy is used without it
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# TurboJPEG decodes JPEGs directly at a reduced scale; Pillow's draft mode
+# is used instead when it (or the libturbojpeg system library) is missing
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    jpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, RuntimeError, OSError):
+    TURBOJPEG_AVAILABLE = False
+    jpeg = None
+
 # Global model variable
 model = None
+infer = None
+loaded_model_path = None
 demo_mode = False
 
+# Micro-batching queue and its background worker (created in lifespan)
+batch_queue = None
+batch_worker_task = None
+
+# Reusable float32 input buffer of shape (MAX_BATCH_SIZE, 224, 224, 3), only
+# ever filled by the batch worker (created in lifespan)
+batch_buffer = None
+
+# LRU cache of predictions keyed by a hash of the uploaded bytes
+prediction_cache = OrderedDict()
+
 # Model configuration
 MODEL_PATH = os.getenv("MODEL_PATH", "model.h5")
+# Quantized TFLite model picked up automatically when it sits next to MODEL_PATH
+# (create it with `python convert_model.py`)
+TFLITE_MODEL_PATH = os.path.join(os.path.dirname(MODEL_PATH), "model_int8.tflite")
 IMG_SIZE = (224, 224)
 DEMO_MODE = os.getenv("DEMO_MODE", "false").lower() == "true"
 
+# Micro-batching configuration: concurrent requests are coalesced into a
+# single forward pass of up to MAX_BATCH_SIZE images, waiting at most
+# MAX_BATCH_LATENCY_MS for the batch to fill up.
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "16"))
+MAX_BATCH_LATENCY_MS = float(os.getenv("MAX_BATCH_LATENCY_MS", "10"))
+
+# Uploads are hashed in chunks of this size instead of being read at once
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Number of predictions kept for repeated uploads of identical images (0 disables)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "1024"))
+
+# Keras mixed-precision policy for inference, e.g. "mixed_bfloat16" on CPUs
+# with AVX-512 BF16/AMX or "mixed_float16" on NVIDIA GPUs (empty = float32)
+MIXED_PRECISION = os.getenv("MIXED_PRECISION", "")
+
+def run_batch(images: list) -> np.ndarray:
+    """
+    Normalize resized uint8 images into the shared batch buffer in place
+    and run the model on them.
+    """
+    batch = batch_buffer[:len(images)]
+    for slot, pixels in zip(batch, images):
+        normalize_image(pixels, out=slot)
+    return infer(batch)
+
+def warm_up():
+    """
+    Run dummy batches through the full inference path at startup, so the
+    first real request does not pay for tracing, JIT compilation, kernel
+    selection and buffer allocation.
+    """
+    for batch_size in (MAX_BATCH_SIZE, 1):
+        run_batch([np.zeros((*IMG_SIZE, 3), dtype=np.uint8)] * batch_size)
+
+async def batch_worker(queue: asyncio.Queue):
+    """
+    Collect queued (image, future) pairs into batches and run the model once
+    per batch, fanning the predictions back out to the waiting requests.
+    """
+    loop = asyncio.get_running_loop()
+    max_wait = MAX_BATCH_LATENCY_MS / 1000.0
+    
+    while True:
+        # Block until at least one request is waiting
+        items = [await queue.get()]
+        deadline = loop.time() + max_wait
+        
+        # Fill the batch until it is full or the latency budget is spent
+        while len(items) < MAX_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        try:
+            # Normalize and run the forward pass off the event loop
+            predictions = await asyncio.to_thread(
+                run_batch, [pixels for pixels, _ in items]
+            )
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        
+        for i, (_, future) in enumerate(items):
+            # The request may have been cancelled (client disconnected)
+            if not future.done():
+                future.set_result(predictions[i])
+
+def resolve_model_path() -> str:
+    """
+    Pick the model file to serve: an explicit .tflite or .onnx MODEL_PATH,
+    else a quantized model_int8.tflite next to MODEL_PATH, else MODEL_PATH.
+    """
+    if MODEL_PATH.endswith((".tflite", ".onnx")):
+        return MODEL_PATH
+    if os.path.exists(TFLITE_MODEL_PATH):
+        return TFLITE_MODEL_PATH
+    return MODEL_PATH
+
+def set_layer_dtypes(config, policy: str):
+    """
+    Recursively set the dtype policy of every layer in a Keras model config,
+    including the layers of nested models (e.g. the ResNet50 base).
+    """
+    if isinstance(config, dict):
+        layer_config = config.get("config")
+        if (
+            "class_name" in config
+            and config["class_name"] != "InputLayer"
+            and isinstance(layer_config, dict)
+            and "dtype" in layer_config
+        ):
+            layer_config["dtype"] = policy
+        for value in config.values():
+            set_layer_dtypes(value, policy)
+    elif isinstance(config, list):
+        for value in config:
+            set_layer_dtypes(value, policy)
+
+def cast_to_mixed_precision(keras_model, policy: str):
+    """
+    Rebuild a loaded Keras model under a mixed-precision policy. Loaded
+    layers keep the float32 policy stored in the model file, so the model
+    is recreated from its config with the new policy and the weights are
+    copied over. The output layer stays float32 for stable predictions.
+    """
+    keras.mixed_precision.set_global_policy(policy)
+    config = keras_model.get_config()
+    set_layer_dtypes(config, policy)
+    config["layers"][-1]["config"]["dtype"] = "float32"
+    
+    mixed_model = keras_model.__class__.from_config(config)
+    mixed_model.set_weights(keras_model.get_weights())
+    return mixed_model
+
+def load_keras_model(path: str):
+    """
+    Load a Keras model and return (model, infer), where infer maps a float32
+    batch of shape (N, 224, 224, 3) to a numpy array of predictions.
+    """
+    keras_model = keras.models.load_model(path)
+    
+    if MIXED_PRECISION:
+        try:
+            keras_model = cast_to_mixed_precision(keras_model, MIXED_PRECISION)
+            print(f"   Mixed precision: {MIXED_PRECISION}")
+        except Exception as e:
+            keras.mixed_precision.set_global_policy("float32")
+            print(f"⚠️  Could not apply mixed precision ({str(e)}), using float32")
+    
+    print(f"   Model input shape: {keras_model.input_shape}")
+    print(f"   Model output shape: {keras_model.output_shape}")
+    
+    # Wrap the forward pass in a tf.function with a fixed signature so it
+    # is traced once (for any batch size) instead of going through the
+    # Keras predict loop on every call (traced during warm_up)
+    forward = tf.function(
+        lambda x: keras_model(x, training=False),
+        input_signature=[tf.TensorSpec([None, *IMG_SIZE, 3], tf.float32)]
+    )
+    
+    def run(batch: np.ndarray) -> np.ndarray:
+        return forward(tf.convert_to_tensor(batch, tf.float32)).numpy()
+    
+    return keras_model, run
+
+def load_tflite_model(path: str):
+    """
+    Load a (quantized) TFLite model and return (interpreter, infer), where
+    infer has the same contract as for Keras models.
+    """
+    interpreter = tf.lite.Interpreter(model_path=path, num_threads=CPU_THREADS)
+    input_details = interpreter.get_input_details()[0]
+    
+    # Micro-batches vary in size on almost every call, and resizing the input
+    # re-prepares the interpreter (and XNNPACK) each time. Instead, the tensors
+    # are allocated once for a single image and batches are run image by image.
+    if input_details["shape"][0] != 1:
+        interpreter.resize_tensor_input(input_details["index"], [1, *IMG_SIZE, 3])
+    interpreter.allocate_tensors()
+    input_details = interpreter.get_input_details()[0]
+    output_details = interpreter.get_output_details()[0]
+    print(f"   Model input: {input_details['shape']} {input_details['dtype'].__name__}")
+    print(f"   Model output: {output_details['shape']} {output_details['dtype'].__name__}")
+    
+    # The interpreter is stateful and not thread-safe
+    lock = threading.Lock()
+    
+    def run(batch: np.ndarray) -> np.ndarray:
+        # Fully integer models take quantized inputs
+        scale, zero_point = input_details["quantization"]
+        if input_details["dtype"] != np.float32 and scale:
+            limits = np.iinfo(input_details["dtype"])
+            batch = np.clip(np.round(batch / scale + zero_point), limits.min, limits.max)
+            batch = batch.astype(input_details["dtype"])
+        
+        outputs = []
+        with lock:
+            for i in range(len(batch)):
+                interpreter.set_tensor(input_details["index"], batch[i:i + 1])
+                interpreter.invoke()
+                outputs.append(interpreter.get_tensor(output_details["index"]).copy())
+        output = np.concatenate(outputs, axis=0)
+        
+        scale, zero_point = output_details["quantization"]
+        if output_details["dtype"] != np.float32 and scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+    
+    return interpreter, run
+
+def load_onnx_model(path: str):
+    """
+    Load an ONNX model into an ONNX Runtime CPU session and return
+    (session, infer), where infer has the same contract as for Keras models.
+    """
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = CPU_THREADS
+    session = ort.InferenceSession(
+        path, sess_options=options, providers=["CPUExecutionProvider"]
+    )
+    model_input = session.get_inputs()[0]
+    model_output = session.get_outputs()[0]
+    print(f"   Model input: {model_input.shape} {model_input.type}")
+    print(f"   Model output: {model_output.shape} {model_output.type}")
+    
+    # InferenceSession.run is thread-safe
+    def run(batch: np.ndarray) -> np.ndarray:
+        return session.run([model_output.name], {model_input.name: batch})[0]
+    
+    return session, run
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Load model on startup and clean up on shutdown.
     This ensures zero-latency predictions after initial load.
     """
-    global model, demo_mode
+    global model, infer, loaded_model_path, demo_mode
+    global batch_queue, batch_worker_task, batch_buffer
     
     # Load model on startup
     print(f"Loading model from {MODEL_PATH}...")
     try:
-        if not TENSORFLOW_AVAILABLE:
+        model_path = resolve_model_path()
+        use_onnx = model_path.endswith(".onnx")
+        
+        if use_onnx and not ONNXRUNTIME_AVAILABLE:
+            print("⚠️  ONNX Runtime not available")
+            print("🔄 Running in DEMO MODE - returning mock predictions")
+            print("   Install onnxruntime to serve .onnx models")
+            demo_mode = True
+        elif not use_onnx and not TENSORFLOW_AVAILABLE:
             print("⚠️  TensorFlow not available")
             print("🔄 Running in DEMO MODE - returning mock predictions")
             print("   Install TensorFlow to use trained models")
             demo_mode = True
-        elif not os.path.exists(MODEL_PATH):
+        elif not os.path.exists(model_path):
             print(f"⚠️  Model file not found at {MODEL_PATH}")
             print("🔄 Running in DEMO MODE - returning mock predictions")
             print("   To use real predictions, train a model and place model.h5 in the backend directory")
             demo_mode = True
         else:
-            model = keras.models.load_model(MODEL_PATH)
-            print("✅ Model loaded successfully!")
-            print(f"   Model input shape: {model.input_shape}")
-            print(f"   Model output shape: {model.output_shape}")
+            loaded_model_path = model_path
+            if use_onnx:
+                model, infer = load_onnx_model(loaded_model_path)
+            elif loaded_model_path.endswith(".tflite"):
+                model, infer = load_tflite_model(loaded_model_path)
+            else:
+                model, infer = load_keras_model(loaded_model_path)
+            print(f"✅ Model loaded successfully from {loaded_model_path}!")
             demo_mode = False
+            
+            batch_buffer = np.empty((MAX_BATCH_SIZE, *IMG_SIZE, 3), dtype=np.float32)
+            warm_up()
+            print(f"   Warmed up with batch sizes {MAX_BATCH_SIZE} and 1")
+            
+            # Start the micro-batching worker
+            batch_queue = asyncio.Queue()
+            batch_worker_task = asyncio.create_task(batch_worker(batch_queue))
+            print(f"   Micro-batching: max {MAX_BATCH_SIZE} images / {MAX_BATCH_LATENCY_MS:g} ms")
     except Exception as e:
         print(f"⚠️  Error loading model: {str(e)}")
         print("🔄 Running in DEMO MODE - returning mock predictions")
         demo_mode = True
+        # Loading may have failed after the model was assigned (e.g. during
+        # warm-up); don't report a half-initialized model as loaded
+        model = None
+        infer = None
+        loaded_model_path = None
+        batch_buffer = None
     
     yield
     
     # Cleanup on shutdown (if needed)
+    if batch_worker_task is not None:
+        batch_worker_task.cancel()
+        try:
+            await batch_worker_task
+        except asyncio.CancelledError:
+            pass
+        batch_worker_task = None
+        batch_queue = None
+        batch_buffer = None
+    prediction_cache.clear()
     model = None
+    infer = None
+    loaded_model_path = None
     print("Model unloaded.")
 
 # Initialize FastAPI app with lifespan
@@ -74,7 +424,8 @@ app = FastAPI(
     title="Freshness Predictor API",
     description="Computer Vision API for predicting days remaining until spoiled",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # API Key for authentication (set via environment variable)
@@ -91,7 +442,6 @@ app.add_middleware(
 
 # API Key validation middleware
 from fastapi import Request, status
-from fastapi.responses import JSONResponse
 
 @app.middleware("http")
 async def validate_api_key(request: Request, call_next):
@@ -104,7 +454,7 @@ async def validate_api_key(request: Request, call_next):
     if API_KEY:
         api_key_header = request.headers.get("X-API-Key")
         if api_key_header != API_KEY:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Invalid or missing API key"}
             )
@@ -112,26 +462,107 @@ async def validate_api_key(request: Request, call_next):
     response = await call_next(request)
     return response
 
-def preprocess_image(image: Image.Image) -> np.ndarray:
+def jpeg_scaling_factor(width: int, height: int) -> tuple:
+    """
+    Smallest TurboJPEG downscaling factor that still covers IMG_SIZE.
+    """
+    for num, denom in sorted(jpeg.scaling_factors, key=lambda f: f[0] / f[1]):
+        if num > denom:
+            break
+        if width * num // denom >= IMG_SIZE[0] and height * num // denom >= IMG_SIZE[1]:
+            return (num, denom)
+    return (1, 1)
+
+def hash_upload(f: BinaryIO) -> xxhash.xxh3_128:
     """
-    Preprocess image for model inference.
-    Resizes to IMG_SIZE and normalizes pixel values.
+    Hash an uploaded file chunk by chunk, so it never has to be held in
+    memory as a single bytes object.
     """
-    # Resize image
-    image = image.resize(IMG_SIZE)
+    f.seek(0)
+    upload_hash = xxhash.xxh3_128()
+    for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+        upload_hash.update(chunk)
+    f.seek(0)
+    return upload_hash
+
+def decode_image(f: BinaryIO) -> np.ndarray:
+    """
+    Decode an uploaded image file into an RGB uint8 array.
+    Large JPEGs are decoded at a reduced scale in the DCT domain, so the
+    full-resolution image never has to be decompressed.
+    """
+    # JPEG files start with the SOI marker
+    is_jpeg = f.read(2) == b"\xff\xd8"
+    f.seek(0)
+    
+    if TURBOJPEG_AVAILABLE and is_jpeg:
+        # TurboJPEG needs the compressed bytes in memory
+        contents = f.read()
+        try:
+            width, height, _, _ = jpeg.decode_header(contents)
+            return jpeg.decode(
+                contents,
+                pixel_format=TJPF_RGB,
+                scaling_factor=jpeg_scaling_factor(width, height)
+            )
+        except OSError:
+            f.seek(0)  # e.g. CMYK JPEGs - let Pillow handle them
     
-    # Convert to RGB if needed
+    # Pillow reads from the (spooled) file directly
+    image = Image.open(f)
+    # Ask libjpeg for the smallest 1/2, 1/4 or 1/8 scale that still covers
+    # IMG_SIZE (no-op for other formats)
+    image.draft("RGB", IMG_SIZE)
     if image.mode != "RGB":
         image = image.convert("RGB")
-    
-    # Convert to array and normalize
-    img_array = np.array(image) / 255.0
-    
-    # Add batch dimension
-    img_array = np.expand_dims(img_array, axis=0)
-    
+    return np.asarray(image, dtype=np.uint8)
+
+def resize_image(pixels: np.ndarray) -> np.ndarray:
+    """
+    Resize a decoded RGB uint8 image to IMG_SIZE.
+    """
+    if OPENCV_AVAILABLE:
+        # INTER_AREA avoids aliasing when shrinking large photos
+        shrinking = pixels.shape[1] > IMG_SIZE[0] and pixels.shape[0] > IMG_SIZE[1]
+        return cv2.resize(
+            pixels, IMG_SIZE,
+            interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR
+        )
+    image = Image.fromarray(pixels).resize(IMG_SIZE, Image.BILINEAR)
+    return np.asarray(image, dtype=np.uint8)
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, fastmath=True, parallel=True)
+    def _u8_to_f32_norm(src, dst):
+        scale = np.float32(1.0 / 255.0)
+        for i in numba.prange(src.shape[0]):
+            for j in range(src.shape[1]):
+                for c in range(src.shape[2]):
+                    dst[i, j, c] = src[i, j, c] * scale
+
+def normalize_image(pixels: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Scale uint8 pixels to [0, 1] straight into the float32 array `out`
+    (avoids a float64 temporary).
+    """
+    if NUMBA_AVAILABLE:
+        _u8_to_f32_norm(pixels, out)
+        return out
+    return np.multiply(pixels, np.float32(1.0 / 255.0), out=out)
+
+def preprocess_image(pixels: np.ndarray) -> np.ndarray:
+    """
+    Preprocess a decoded RGB image for model inference.
+    Resizes to IMG_SIZE and normalizes pixel values into a batch of one.
+    """
+    img_array = np.empty((1, *IMG_SIZE, 3), dtype=np.float32)
+    normalize_image(resize_image(pixels), out=img_array[0])
     return img_array
 
+def load_image(f: BinaryIO) -> np.ndarray:
+    """Decode and resize an uploaded image file (normalized later, per batch)"""
+    return resize_image(decode_image(f))
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -148,9 +579,97 @@ async def health():
         "status": "healthy",
         "model_loaded": model is not None,
         "demo_mode": demo_mode,
-        "model_path": MODEL_PATH if model else None
+        "model_path": loaded_model_path if model else None
     }
 
+def demo_prediction(upload_hash: xxhash.xxh3_128) -> dict:
+    """
+    Mock prediction based on the image hash (computed from the raw bytes,
+    the image is never decoded).
+    """
+    # This is just for demo - real model would be much more sophisticated
+    img_hash = upload_hash.intdigest()
+    days_remaining = 2.5 + (img_hash % 100) / 50.0  # Random between 2.5-4.5
+    days_remaining = max(0.0, min(5.0, days_remaining))
+    
+    return {
+        "days_remaining": round(days_remaining, 2),
+        "status": "success",
+        "demo_mode": True,
+        "message": "⚠️ Demo mode: This is a mock prediction. Train a model for real predictions."
+    }
+
+async def predict_days(images: list) -> list:
+    """
+    Queue resized images for the batch worker and wait for their predictions.
+    The images are queued together, so they share a forward pass.
+    """
+    loop = asyncio.get_running_loop()
+    futures = []
+    for pixels in images:
+        future = loop.create_future()
+        batch_queue.put_nowait((pixels, future))
+        futures.append(future)
+    predictions = await asyncio.gather(*futures)
+    
+    # Clamp predictions to reasonable range (0-5 days)
+    return [max(0.0, min(5.0, float(prediction[0]))) for prediction in predictions]
+
+async def predict_uploads(files: list) -> list:
+    """
+    Predict days remaining for uploaded images. Cached images are answered
+    directly; all others go through the model together.
+    """
+    # Hash the uploads straight from their spooled temporary files, off the
+    # event loop, instead of buffering them with `await file.read()`
+    upload_hashes = await asyncio.gather(
+        *(asyncio.to_thread(hash_upload, file.file) for file in files)
+    )
+    
+    # Demo mode: return mock predictions
+    if demo_mode or model is None:
+        return [demo_prediction(upload_hash) for upload_hash in upload_hashes]
+    
+    # Real mode: use actual model
+    # Identical uploads get the cached prediction without a forward pass
+    cache_keys = [upload_hash.digest() for upload_hash in upload_hashes]
+    days = [prediction_cache.get(cache_key) for cache_key in cache_keys]
+    # First index of each distinct uncached image; identical files in the
+    # same request share one prediction
+    misses = {}
+    for i, days_remaining in enumerate(days):
+        if days_remaining is None:
+            misses.setdefault(cache_keys[i], i)
+        else:
+            prediction_cache.move_to_end(cache_keys[i])
+    
+    if misses:
+        # Decode and resize in worker threads so the event loop
+        # keeps serving other requests meanwhile
+        images = await asyncio.gather(
+            *(asyncio.to_thread(load_image, files[i].file) for i in misses.values())
+        )
+        
+        predicted = dict(zip(misses, await predict_days(images)))
+        for cache_key, days_remaining in predicted.items():
+            if PREDICTION_CACHE_SIZE > 0:
+                prediction_cache[cache_key] = days_remaining
+                if len(prediction_cache) > PREDICTION_CACHE_SIZE:
+                    prediction_cache.popitem(last=False)
+        days = [
+            predicted[cache_key] if days_remaining is None else days_remaining
+            for cache_key, days_remaining in zip(cache_keys, days)
+        ]
+    
+    return [
+        {
+            "days_remaining": round(days_remaining, 2),
+            "status": "success",
+            "demo_mode": False
+        }
+        for days_remaining in days
+    ]
+
 @app.post("/predict")
 async def predict(file: UploadFile = File(...)):
     """
@@ -170,50 +689,8 @@ async def predict(file: UploadFile = File(...)):
         )
     
     try:
-        # Read image file
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        
-        # Demo mode: return mock prediction based on image characteristics
-        if demo_mode or model is None:
-            # Simple heuristic: analyze image brightness/color to estimate freshness
-            # In demo mode, we'll return a random-ish value based on image hash
-            img_array = np.array(image)
-            # Simple heuristic: calculate average brightness
-            if len(img_array.shape) == 3:
-                brightness = np.mean(img_array)
-            else:
-                brightness = np.mean(img_array)
-            
-            # Mock prediction: fresher items tend to be brighter (for bananas)
-            # This is just for demo - real model would be much more sophisticated
-            img_hash = int(hashlib.md5(contents).hexdigest()[:8], 16)
-            days_remaining = 2.5 + (img_hash % 100) / 50.0  # Random between 2.5-4.5
-            days_remaining = max(0.0, min(5.0, days_remaining))
-            
-            return JSONResponse(content={
-                "days_remaining": round(days_remaining, 2),
-                "status": "success",
-                "demo_mode": True,
-                "message": "⚠️ Demo mode: This is a mock prediction. Train a model for real predictions."
-            })
-        
-        # Real mode: use actual model
-        # Preprocess image
-        img_array = preprocess_image(image)
-        
-        # Make prediction
-        prediction = model.predict(img_array, verbose=0)
-        days_remaining = float(prediction[0][0])
-        
-        # Clamp prediction to reasonable range (0-5 days)
-        days_remaining = max(0.0, min(5.0, days_remaining))
-        
-        return JSONResponse(content={
-            "days_remaining": round(days_remaining, 2),
-            "status": "success",
-            "demo_mode": False
-        })
+        results = await predict_uploads([file])
+        return results[0]
     
     except Exception as e:
         raise HTTPException(
@@ -221,7 +698,50 @@ async def predict(file: UploadFile = File(...)):
             detail=f"Error processing image: {str(e)}"
         )
 
+@app.post("/predict_batch")
+async def predict_batch(files: List[UploadFile] = File(...)):
+    """
+    Predict days remaining until spoiled for several uploaded images,
+    scored together in a single forward pass.
+    
+    Args:
+        files: Up to MAX_BATCH_SIZE image files (JPEG, PNG, etc.)
+    
+    Returns:
+        JSON list with one prediction per file: [{"days_remaining": float}, ...]
+    """
+    if len(files) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_SIZE} images can be sent per request"
+        )
+    
+    # Validate file types
+    for file in files:
+        if not file.content_type.startswith("image/"):
+            raise HTTPException(
+                status_code=400,
+                detail=f"{file.filename} must be an image (JPEG, PNG, etc.)"
+            )
+    
+    try:
+        return await predict_uploads(files)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing images: {str(e)}"
+        )
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        workers=WORKERS,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning"
+    )
 
@@ -5,13 +5,24 @@ Interactive UI for uploading images and viewing predictions
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
+import html
 import io
 import os
 
 # Configuration
 API_URL = os.getenv("API_URL", "http://localhost:8000")
 PREDICT_ENDPOINT = f"{API_URL}/predict"
+PREDICT_BATCH_ENDPOINT = f"{API_URL}/predict_batch"
+# Images per /predict_batch request (the backend's MAX_BATCH_SIZE)
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "16"))
+
+# Uploaded image previews: decoded at most at this size, and cached for a
+# bounded number of uploads (the cache is shared by all sessions)
+PREVIEW_SIZE = (800, 800)
+PREVIEW_CACHE_ENTRIES = 64
+PREVIEW_CACHE_TTL = 3600  # seconds
 
 # Page configuration
 st.set_page_config(
@@ -52,6 +63,58 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+def get_http_session() -> requests.Session:
+    """
+    Per-user HTTP session, reused across reruns so calls to the backend
+    keep their TCP/TLS connection alive instead of reconnecting every time.
+    """
+    if "http" not in st.session_state:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        st.session_state.http = session
+    return st.session_state.http
+
+@st.cache_data(show_spinner=False, max_entries=PREVIEW_CACHE_ENTRIES, ttl=PREVIEW_CACHE_TTL)
+def decode_image(file_bytes: bytes) -> Image.Image:
+    """
+    Decode uploaded image bytes into a display-sized preview. Cached on the
+    bytes, so the image is not decoded again on every rerun (any widget
+    interaction). Only the thumbnail is cached, never the full-resolution image.
+    """
+    image = Image.open(io.BytesIO(file_bytes))
+    image.thumbnail(PREVIEW_SIZE)
+    # Keep transparency for display; only convert modes browsers can't show
+    if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+        image = image.convert("RGB")
+    return image
+
+def show_prediction(days_remaining: float, title: str = "Prediction Result"):
+    """
+    Display a single prediction with its freshness assessment.
+    """
+    st.markdown(f"""
+        <div class="prediction-box">
+            <h2>{html.escape(title)}</h2>
+            <div class="prediction-value">{days_remaining:.1f}</div>
+            <h3>Days Remaining</h3>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Additional info
+    days_int = int(round(days_remaining))
+    if days_int == 0:
+        st.error("⚠️ Item is spoiled or very close to spoiling!")
+    elif days_int <= 1:
+        st.warning("🔴 Item will spoil very soon (within 1 day)")
+    elif days_int <= 2:
+        st.warning("🟡 Item will spoil soon (within 2 days)")
+    elif days_int <= 3:
+        st.info("🟠 Item has moderate freshness (2-3 days remaining)")
+    else:
+        st.success("🟢 Item is fresh! (3+ days remaining)")
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🍌 Freshness Predictor</h1>', unsafe_allow_html=True)
@@ -67,7 +130,7 @@ def main():
         
         # Check API health
         try:
-            response = requests.get(f"{API_URL}/health", timeout=5)
+            response = get_http_session().get(f"{API_URL}/health", timeout=5)
             if response.status_code == 200:
                 health_data = response.json()
                 st.success("✅ API is healthy")
@@ -79,59 +142,64 @@ def main():
             st.info("Make sure your FastAPI backend is running!")
     
     # File uploader
-    uploaded_file = st.file_uploader(
-        "Choose an image file",
+    uploaded_files = st.file_uploader(
+        "Choose image files",
         type=['jpg', 'jpeg', 'png'],
-        help="Upload an image of a perishable item (e.g., banana)"
+        accept_multiple_files=True,
+        help="Upload one or more images of perishable items (e.g., bananas)"
     )
     
-    if uploaded_file is not None:
-        # Display uploaded image
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Uploaded Image", use_container_width=True)
+    if uploaded_files:
+        # Display uploaded images
+        images = [decode_image(f.getvalue()) for f in uploaded_files]
+        if len(images) == 1:
+            st.image(images[0], caption="Uploaded Image", use_container_width=True)
+        else:
+            st.image(images, caption=[f.name for f in uploaded_files], width=200)
         
         # Predict button
         if st.button("🔮 Predict Freshness", type="primary", use_container_width=True):
-            with st.spinner("Analyzing image..."):
+            with st.spinner("Analyzing images..."):
                 try:
-                    # Prepare image for API
-                    img_bytes = io.BytesIO()
-                    image.save(img_bytes, format='JPEG')
-                    img_bytes.seek(0)
-                    
-                    # Send request to FastAPI
-                    files = {"file": ("image.jpg", img_bytes, "image/jpeg")}
-                    response = requests.post(PREDICT_ENDPOINT, files=files, timeout=30)
+                    # Send the original upload bytes as-is (no JPEG re-encode)
+                    uploads = [
+                        (f.name, f.getvalue(), f.type or "image/jpeg")
+                        for f in uploaded_files
+                    ]
                     
-                    if response.status_code == 200:
-                        result = response.json()
-                        days_remaining = result.get("days_remaining", 0)
-                        
-                        # Display prediction
-                        st.markdown("---")
-                        st.markdown(f"""
-                            <div class="prediction-box">
-                                <h2>Prediction Result</h2>
-                                <div class="prediction-value">{days_remaining:.1f}</div>
-                                <h3>Days Remaining</h3>
-                            </div>
-                        """, unsafe_allow_html=True)
+                    # Send requests to FastAPI (several images are scored in one batch,
+                    # at most MAX_BATCH_SIZE per request)
+                    results = []
+                    error_msg = None
+                    for start in range(0, len(uploads), MAX_BATCH_SIZE):
+                        chunk = uploads[start:start + MAX_BATCH_SIZE]
+                        if len(chunk) == 1:
+                            response = get_http_session().post(
+                                PREDICT_ENDPOINT, files={"file": chunk[0]}, timeout=30
+                            )
+                        else:
+                            response = get_http_session().post(
+                                PREDICT_BATCH_ENDPOINT,
+                                files=[("files", upload) for upload in chunk],
+                                timeout=30
+                            )
                         
-                        # Additional info
-                        days_int = int(round(days_remaining))
-                        if days_int == 0:
-                            st.error("⚠️ Item is spoiled or very close to spoiling!")
-                        elif days_int <= 1:
-                            st.warning("🔴 Item will spoil very soon (within 1 day)")
-                        elif days_int <= 2:
-                            st.warning("🟡 Item will spoil soon (within 2 days)")
-                        elif days_int <= 3:
-                            st.info("🟠 Item has moderate freshness (2-3 days remaining)")
+                        if response.status_code != 200:
+                            error_msg = response.json().get("detail", "Unknown error")
+                            break
+                        if len(chunk) == 1:
+                            results.append(response.json())
                         else:
-                            st.success("🟢 Item is fresh! (3+ days remaining)")
+                            results.extend(response.json())
+                    
+                    if error_msg is None:
+                        # Display predictions
+                        st.markdown("---")
+                        for uploaded_file, result in zip(uploaded_files, results):
+                            title = "Prediction Result" if len(results) == 1 else uploaded_file.name
+                            show_prediction(result.get("days_remaining", 0), title)
                     
                     else:
-                        error_msg = response.json().get("detail", "Unknown error")
                         st.error(f"❌ Prediction failed: {error_msg}")
                 
                 except requests.exceptions.RequestException as e:
@@ -156,8 +224,8 @@ def main():
         4. **Deploy the frontend**: Deploy this Streamlit app to Streamlit Cloud with 
            the `API_URL` environment variable set to your FastAPI backend URL.
         
-        5. **Use the app**: Upload an image and click "Predict Freshness" to get the 
-           prediction!
+        5. **Use the app**: Upload one or more images and click "Predict Freshness" to 
+           get the predictions!
         """)
     
     # Footer
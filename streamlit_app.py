@@ -4,7 +4,9 @@ Entry point for Streamlit Cloud deployment
 """
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
+import html
 import io
 import os
 
@@ -14,6 +16,15 @@ import os
 API_URL = os.getenv("API_URL", "")
 API_KEY = os.getenv("API_KEY", "")  # Optional: API key for authentication
 PREDICT_ENDPOINT = f"{API_URL}/predict" if API_URL else None
+PREDICT_BATCH_ENDPOINT = f"{API_URL}/predict_batch" if API_URL else None
+# Images per /predict_batch request (the backend's MAX_BATCH_SIZE)
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "16"))
+
+# Uploaded image previews: decoded at most at this size, and cached for a
+# bounded number of uploads (the cache is shared by all sessions)
+PREVIEW_SIZE = (800, 800)
+PREVIEW_CACHE_ENTRIES = 64
+PREVIEW_CACHE_TTL = 3600  # seconds
 
 # Page configuration
 st.set_page_config(
@@ -54,6 +65,58 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+def get_http_session() -> requests.Session:
+    """
+    Per-user HTTP session, reused across reruns so calls to the backend
+    keep their TCP/TLS connection alive instead of reconnecting every time.
+    """
+    if "http" not in st.session_state:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        st.session_state.http = session
+    return st.session_state.http
+
+@st.cache_data(show_spinner=False, max_entries=PREVIEW_CACHE_ENTRIES, ttl=PREVIEW_CACHE_TTL)
+def decode_image(file_bytes: bytes) -> Image.Image:
+    """
+    Decode uploaded image bytes into a display-sized preview. Cached on the
+    bytes, so the image is not decoded again on every rerun (any widget
+    interaction). Only the thumbnail is cached, never the full-resolution image.
+    """
+    image = Image.open(io.BytesIO(file_bytes))
+    image.thumbnail(PREVIEW_SIZE)
+    # Keep transparency for display; only convert modes browsers can't show
+    if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+        image = image.convert("RGB")
+    return image
+
+def show_prediction(days_remaining: float, title: str = "Prediction Result"):
+    """
+    Display a single prediction with its freshness assessment.
+    """
+    st.markdown(f"""
+        <div class="prediction-box">
+            <h2>{html.escape(title)}</h2>
+            <div class="prediction-value">{days_remaining:.1f}</div>
+            <h3>Days Remaining</h3>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Additional info
+    days_int = int(round(days_remaining))
+    if days_int == 0:
+        st.error("⚠️ Item is spoiled or very close to spoiling!")
+    elif days_int <= 1:
+        st.warning("🔴 Item will spoil very soon (within 1 day)")
+    elif days_int <= 2:
+        st.warning("🟡 Item will spoil soon (within 2 days)")
+    elif days_int <= 3:
+        st.info("🟠 Item has moderate freshness (2-3 days remaining)")
+    else:
+        st.success("🟢 Item is fresh! (3+ days remaining)")
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🍌 Freshness Predictor</h1>', unsafe_allow_html=True)
@@ -95,7 +158,7 @@ def main():
                 headers = {}
                 if API_KEY:
                     headers["X-API-Key"] = API_KEY
-                response = requests.get(f"{API_URL}/health", headers=headers, timeout=5)
+                response = get_http_session().get(f"{API_URL}/health", headers=headers, timeout=5)
                 if response.status_code == 200:
                     health_data = response.json()
                     st.success("✅ API is healthy")
@@ -110,10 +173,11 @@ def main():
                 st.info("Make sure your FastAPI backend is deployed and accessible!")
     
     # File uploader
-    uploaded_file = st.file_uploader(
-        "Choose an image file",
+    uploaded_files = st.file_uploader(
+        "Choose image files",
         type=['jpg', 'jpeg', 'png'],
-        help="Upload an image of a perishable item (e.g., banana)"
+        accept_multiple_files=True,
+        help="Upload one or more images of perishable items (e.g., bananas)"
     )
     
     if not API_URL:
@@ -121,60 +185,63 @@ def main():
         st.info("See the sidebar for instructions on how to set it up.")
         return
     
-    if uploaded_file is not None:
-        # Display uploaded image
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Uploaded Image", use_container_width=True)
+    if uploaded_files:
+        # Display uploaded images
+        images = [decode_image(f.getvalue()) for f in uploaded_files]
+        if len(images) == 1:
+            st.image(images[0], caption="Uploaded Image", use_container_width=True)
+        else:
+            st.image(images, caption=[f.name for f in uploaded_files], width=200)
         
         # Predict button
         if st.button("🔮 Predict Freshness", type="primary", use_container_width=True):
-            with st.spinner("Analyzing image..."):
+            with st.spinner("Analyzing images..."):
                 try:
-                    # Prepare image for API
-                    img_bytes = io.BytesIO()
-                    image.save(img_bytes, format='JPEG')
-                    img_bytes.seek(0)
+                    # Send the original upload bytes as-is (no JPEG re-encode)
+                    uploads = [
+                        (f.name, f.getvalue(), f.type or "image/jpeg")
+                        for f in uploaded_files
+                    ]
                     
-                    # Send request to FastAPI
-                    files = {"file": ("image.jpg", img_bytes, "image/jpeg")}
+                    # Send requests to FastAPI (several images are scored in one batch,
+                    # at most MAX_BATCH_SIZE per request)
                     headers = {}
                     if API_KEY:
                         headers["X-API-Key"] = API_KEY
-                    response = requests.post(PREDICT_ENDPOINT, files=files, headers=headers, timeout=30)
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        days_remaining = result.get("days_remaining", 0)
-                        demo_mode = result.get("demo_mode", False)
+                    results = []
+                    error_msg = None
+                    for start in range(0, len(uploads), MAX_BATCH_SIZE):
+                        chunk = uploads[start:start + MAX_BATCH_SIZE]
+                        if len(chunk) == 1:
+                            response = get_http_session().post(
+                                PREDICT_ENDPOINT, files={"file": chunk[0]}, headers=headers, timeout=30
+                            )
+                        else:
+                            response = get_http_session().post(
+                                PREDICT_BATCH_ENDPOINT,
+                                files=[("files", upload) for upload in chunk],
+                                headers=headers, timeout=30
+                            )
                         
-                        # Display prediction
+                        if response.status_code != 200:
+                            error_msg = response.json().get("detail", "Unknown error")
+                            break
+                        if len(chunk) == 1:
+                            results.append(response.json())
+                        else:
+                            results.extend(response.json())
+                    
+                    if error_msg is None:
+                        # Display predictions
                         st.markdown("---")
-                        st.markdown(f"""
-                            <div class="prediction-box">
-                                <h2>Prediction Result</h2>
-                                <div class="prediction-value">{days_remaining:.1f}</div>
-                                <h3>Days Remaining</h3>
-                            </div>
-                        """, unsafe_allow_html=True)
+                        for uploaded_file, result in zip(uploaded_files, results):
+                            title = "Prediction Result" if len(results) == 1 else uploaded_file.name
+                            show_prediction(result.get("days_remaining", 0), title)
                         
-                        if demo_mode:
+                        if any(result.get("demo_mode", False) for result in results):
                             st.info("ℹ️ This is a demo prediction. Train a model for real predictions.")
-                        
-                        # Additional info
-                        days_int = int(round(days_remaining))
-                        if days_int == 0:
-                            st.error("⚠️ Item is spoiled or very close to spoiling!")
-                        elif days_int <= 1:
-                            st.warning("🔴 Item will spoil very soon (within 1 day)")
-                        elif days_int <= 2:
-                            st.warning("🟡 Item will spoil soon (within 2 days)")
-                        elif days_int <= 3:
-                            st.info("🟠 Item has moderate freshness (2-3 days remaining)")
-                        else:
-                            st.success("🟢 Item is fresh! (3+ days remaining)")
                     
                     else:
-                        error_msg = response.json().get("detail", "Unknown error")
                         st.error(f"❌ Prediction failed: {error_msg}")
                 
                 except requests.exceptions.RequestException as e:
@@ -199,8 +266,8 @@ def main():
         4. **Deploy the frontend**: This app is deployed on Streamlit Cloud! Just set 
            the `API_URL` environment variable to your FastAPI backend URL.
         
-        5. **Use the app**: Upload an image and click "Predict Freshness" to get the 
-           prediction!
+        5. **Use the app**: Upload one or more images and click "Predict Freshness" to 
+           get the predictions!
         """)
     
     # Footer